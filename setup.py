@@ -78,6 +78,12 @@ setup(
             'twine>=3.4.1',
             'pytest>=6.2.4',
             'pytest-cov>=2.12.1'
+        ],
+        'parquet': [
+            'pyarrow>=7.0.0'
+        ],
+        'polars': [
+            'polars>=1.0.0'
         ]
     }
 )
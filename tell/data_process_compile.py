@@ -6,6 +6,42 @@ import numpy as np
 from .package_data import get_ba_abbreviations
 
 
+def _newest_file(file_stem: str) -> str:
+    """Find the most recently written .parquet or .csv version of an output file
+
+    :param file_stem:                          Full path to the file without its extension
+    :type file_stem:                           str
+
+    :return:                                   Full path to the newest file, or the .csv path if neither exists
+
+    """
+
+    # Only consider the versions of the file that exist:
+    files = [f'{file_stem}.{i}' for i in ('parquet', 'csv') if os.path.isfile(f'{file_stem}.{i}')]
+
+    # Use the most recently modified file so that stale outputs from an earlier run are not read:
+    if len(files) == 0:
+        return f'{file_stem}.csv'
+
+    return max(files, key=os.path.getmtime)
+
+
+def _read_output_file(file_path: str) -> pd.DataFrame:
+    """Read a .parquet or .csv output file based on its extension
+
+    :param file_path:                          Full path to the .parquet or .csv file
+    :type file_path:                           str
+
+    :return:                                   DataFrame
+
+    """
+
+    if file_path.endswith('.parquet'):
+        return pd.read_parquet(file_path)
+
+    return pd.read_csv(file_path)
+
+
 def compile_data(start_year: int, end_year: int, data_input_dir: str):
     """Merge the load, population, and climate data into a single .csv file for each BA
 
@@ -36,17 +72,24 @@ def compile_data(start_year: int, end_year: int, data_input_dir: str):
     # Loop over the list of BAs to process:
     for i in ba_name:
 
-        # Check to make sure all of the requisite data exist for that BA:
+        # Check to make sure all of the requisite data exist for that BA, using the newest of the .parquet and .csv
+        # load and population files:
+        load_file = _newest_file(os.path.join(load_dir, f"{i}_hourly_load_data"))
+        population_file = _newest_file(os.path.join(population_dir, f"{i}_hourly_population_data"))
+
         all_data_present = False
-        if os.path.isfile(os.path.join(load_dir, f"{i}_hourly_load_data.csv")) is True:
-            if os.path.isfile(os.path.join(population_dir, f"{i}_hourly_population_data.csv")) is True:
+        if os.path.isfile(load_file) is True:
+            if os.path.isfile(population_file) is True:
                 if os.path.isfile(os.path.join(weather_dir, f"{i}_WRF_Hourly_Mean_Meteorology_2019.csv")) is True:
                     all_data_present = True
 
         if all_data_present is True:
             # Read in the historical load and population data for that BA:
-            load_df = pd.read_csv(os.path.join(load_dir, f"{i}_hourly_load_data.csv"))
-            population_df = pd.read_csv(os.path.join(population_dir, f"{i}_hourly_population_data.csv"))
+            load_df = _read_output_file(load_file)
+            population_df = _read_output_file(population_file)
+
+            # Population .parquet files are stored as single precision so cast back to double before rounding:
+            population_df['Total_Population'] = population_df['Total_Population'].astype(np.float64)
 
             # Loop over the range of years defined by the 'start_year' and 'end_year' variables:
             for year in range(start_year, end_year + 1):
@@ -1,13 +1,16 @@
 import os
+import warnings
 
+import numpy as np
+import openpyxl
 import pandas as pd
 
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, effective_n_jobs
 from .package_data import get_ba_abbreviations
 
 
 def list_EIA_930_files(data_input_dir: str) -> list:
-    """Make a list of all the file names for the EIA-930 hourly load dataset
+    """Make a list of all the file names for the EIA-930 hourly load dataset, skipping BAs without a file
 
     :param data_input_dir:         Top-level data directory for TELL
     :type data_input_dir:          str
@@ -16,22 +19,32 @@ def list_EIA_930_files(data_input_dir: str) -> list:
 
     """
 
-    # Get a list of BA abbreviations to process:
-    ba_name = get_ba_abbreviations()
+    # Set the directory where the EIA-930 Excel files are stored:
+    input_dir = os.path.join(data_input_dir, r'tell_raw_data', r'EIA_930', r'Balancing_Authority')
 
-    # Initiate an empty list:
+    # Find the path for each BA in the list of BA abbreviations, only keeping files that exist:
     path_list = []
+    missing = []
+    for i in get_ba_abbreviations():
+        path_to_check = os.path.join(input_dir, f'{i}.xlsx')
+        if os.path.isfile(path_to_check):
+            path_list.append(path_to_check)
+        else:
+            missing.append(i)
+
+    # Raise an error if no files are found:
+    if len(path_list) == 0:
+        msg = f"No EIA-930 files were found in directory '{input_dir}'."
+        raise FileNotFoundError(msg)
+
+    # Warn about the BAs that are skipped:
+    if len(missing) > 0:
+        warnings.warn(f"EIA-930 files were not found for the following BAs and will be skipped: {', '.join(missing)}")
 
-    # Loop over the list and find the path for each BA in the list:
-    for i in ba_name:
-        path_to_check = os.path.join(data_input_dir, r'tell_raw_data', r'EIA_930', r'Balancing_Authority', f'{i}.xlsx')
-        path_list.append(path_to_check)
-
-    # Return the list:
     return path_list
 
 
-def eia_data_subset(file_string: str, data_input_dir: str):
+def eia_data_subset(file_string: str, data_input_dir: str, output_format: str = 'csv'):
     """Extract only the columns TELL needs from the EIA-930 Excel files
 
     :param file_string:            File name of EIA-930 hourly load data by BA
@@ -40,8 +53,16 @@ def eia_data_subset(file_string: str, data_input_dir: str):
     :param data_input_dir:         Top-level data directory for TELL
     :type data_input_dir:          str
 
+    :param output_format:          Format of the output file; either 'csv' (default) or 'parquet'. Writing to
+                                   'parquet' requires the 'parquet' extra (pyarrow).
+    :type output_format:           str
+
     """
 
+    # Make sure the output format is supported:
+    if output_format not in ('csv', 'parquet'):
+        raise ValueError(f"Output format '{output_format}' is not supported. Use either 'csv' or 'parquet'.")
+
     # Set the output directory based on the "data_input_dir" variable:
     output_dir = os.path.join(data_input_dir, r'tell_quickstarter_data', r'outputs', r'historical_ba_load')
 
@@ -49,34 +70,91 @@ def eia_data_subset(file_string: str, data_input_dir: str):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    # Read in the data from the "Published Hourly Data" sheet:
-    df = pd.read_excel(file_string, sheet_name='Published Hourly Data')
+    # Open the workbook in read-only mode so rows are streamed rather than loaded into memory all at once:
+    wb = openpyxl.load_workbook(file_string, read_only=True, data_only=True)
+
+    try:
+        # Recompute the sheet dimensions from the data since the dimensions stored in the file can be wrong:
+        ws = wb['Published Hourly Data']
+        ws.reset_dimensions()
+
+        # Iterate over the cell values in the "Published Hourly Data" sheet:
+        rows = ws.iter_rows(values_only=True)
+
+        # Find the position of each column that is needed from the header row:
+        header = next(rows)
+        col_names = ['UTC time', 'DF', 'Adjusted D', 'Adjusted NG', 'Adjusted TI']
+        col_index = [header.index(i) for i in col_names]
 
-    # Use datetime string to get the year, month, day, and hour:
-    df['Year'] = df['UTC time'].dt.strftime('%Y')
-    df['Month'] = df['UTC time'].dt.strftime('%m')
-    df['Day'] = df['UTC time'].dt.strftime('%d')
-    df['Hour'] = df['UTC time'].dt.strftime('%H')
+        # Only keep the values for the columns that are needed:
+        data = {i: [] for i in col_names}
+        for row in rows:
+
+            # Skip blank rows that Excel can leave at the bottom of the sheet:
+            if all(v is None for v in row):
+                continue
+
+            # Rows can be shorter than the header when their trailing cells are empty:
+            for name, index in zip(col_names, col_index):
+                data[name].append(row[index] if index < len(row) else None)
+
+    finally:
+        wb.close()
+
+    # Build the dataframe from the retained columns:
+    df = pd.DataFrame(data)
+    df['UTC time'] = pd.to_datetime(df['UTC time'])
+
+    # Use the datetime components to get the year, month, day, and hour as integers:
+    ts = df['UTC time']
+    df['Year'] = ts.dt.year.astype(np.int16)
+    df['Month'] = ts.dt.month.astype(np.int8)
+    df['Day'] = ts.dt.day.astype(np.int8)
+    df['Hour'] = ts.dt.hour.astype(np.int8)
 
     # Only keep the columns that are needed:
     col_names = ['Year', 'Month', 'Day', 'Hour', 'DF', 'Adjusted D', 'Adjusted NG', 'Adjusted TI']
-    df = df[col_names].copy()
+    df = df[col_names]
 
     # Rename the columns to add the units to each variable:
-    df.rename(columns={"DF": "Forecast_Demand_MWh",
-                       "Adjusted D": "Adjusted_Demand_MWh",
-                       "Adjusted NG": "Adjusted_Generation_MWh",
-                       "Adjusted TI": "Adjusted_Interchange_MWh"}, inplace=True)
+    df = df.rename(columns={"DF": "Forecast_Demand_MWh",
+                            "Adjusted D": "Adjusted_Demand_MWh",
+                            "Adjusted NG": "Adjusted_Generation_MWh",
+                            "Adjusted TI": "Adjusted_Interchange_MWh"})
 
     # Extract the BA name from the "file_string" variable:
     BA_name = os.path.splitext(os.path.basename(file_string))[0]
 
-    # Write the output to a .csv file:
-    df.to_csv(os.path.join(output_dir, f'{BA_name}_hourly_load_data.csv'), index=False, header=True)
+    # Write the output to a .parquet or .csv file:
+    if output_format == 'parquet':
+        df.to_parquet(os.path.join(output_dir, f'{BA_name}_hourly_load_data.parquet'),
+                      engine='pyarrow',
+                      compression='zstd',
+                      index=False)
+    else:
+        df.to_csv(os.path.join(output_dir, f'{BA_name}_hourly_load_data.csv'), index=False, header=True)
+
 
+def _eia_data_subset_batch(file_strings: list, data_input_dir: str, output_format: str = 'csv'):
+    """Run 'eia_data_subset' sequentially over a batch of EIA-930 Excel files
 
-def process_eia_930_data(data_input_dir: str, n_jobs: int):
-    """Read in list of EIA 930 files, subset the data, and save the output as a .csv file
+    :param file_strings:           List of file names of EIA-930 hourly load data by BA
+    :type file_strings:            list
+
+    :param data_input_dir:         Top-level data directory for TELL
+    :type data_input_dir:          str
+
+    :param output_format:          Format of the output files; either 'csv' (default) or 'parquet'
+    :type output_format:           str
+
+    """
+
+    for file_string in file_strings:
+        eia_data_subset(file_string=file_string, data_input_dir=data_input_dir, output_format=output_format)
+
+
+def process_eia_930_data(data_input_dir: str, n_jobs: int, output_format: str = 'csv', backend: str = 'loky'):
+    """Read in list of EIA 930 files, subset the data, and save the output as a .csv or .parquet file
 
     :param data_input_dir:         Top-level data directory for TELL
     :type data_input_dir:          str
@@ -91,15 +169,29 @@ def process_eia_930_data(data_input_dir: str, n_jobs: int):
                                    parallel_backend context manager that sets another value for n_jobs.
     :type n_jobs:                  int
 
+    :param output_format:          Format of the output files; either 'csv' (default) or 'parquet'. Writing to
+                                   'parquet' requires the 'parquet' extra (pyarrow).
+    :type output_format:           str
+
+    :param backend:                Parallelization backend used by joblib; either 'loky' (default), 'multiprocessing',
+                                   or 'threading'
+    :type backend:                 str
+
     """
 
     # Create the list of EIA-930 Excel files:
     list_of_files = list_EIA_930_files(data_input_dir)
 
-    # Process each file in the list in parallel:
-    Parallel(n_jobs=n_jobs)(
-        delayed(eia_data_subset)(
-            file_string=i,
-            data_input_dir=data_input_dir
-        ) for i in list_of_files
+    # Split the files into two batches per worker so that each task processes several files, which spreads the cost
+    # of starting tasks and passing data between processes while still balancing the load across workers:
+    n_batches = min(len(list_of_files), 2 * effective_n_jobs(n_jobs))
+    batches = [i.tolist() for i in np.array_split(list_of_files, n_batches)] if n_batches > 0 else []
+
+    # Process each batch of files in parallel, dispatching one batch at a time:
+    Parallel(n_jobs=n_jobs, backend=backend, batch_size=1)(
+        delayed(_eia_data_subset_batch)(
+            file_strings=i,
+            data_input_dir=data_input_dir,
+            output_format=output_format
+        ) for i in batches
     )
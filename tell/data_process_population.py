@@ -1,13 +1,59 @@
+import importlib.util
 import os
 
 import numpy as np
 import pandas as pd
 
 from pandas import DataFrame
+from packaging.version import Version
 from glob import glob
 from datetime import datetime
+from functools import lru_cache
 from .metadata_eia import metadata_eia
 
+# Use the multithreaded pyarrow .csv parser when pyarrow is installed and pandas supports it (pandas >= 1.4):
+if importlib.util.find_spec('pyarrow') is not None and Version(pd.__version__) >= Version('1.4'):
+    CSV_ENGINE = 'pyarrow'
+else:
+    CSV_ENGINE = 'c'
+
+
+def _read_csv_fast(file_path: str, **kwargs) -> DataFrame:
+    """Read a .csv file using the pyarrow engine if pyarrow is installed and the default pandas engine otherwise
+
+    :param file_path:                   Full path to the .csv file
+    :type file_path:                    str
+
+    :param kwargs:                      Keyword arguments passed to pandas.read_csv
+
+    :return:                            DataFrame
+
+    """
+
+    return pd.read_csv(file_path, engine=CSV_ENGINE, **kwargs)
+
+
+@lru_cache(maxsize=4)
+def _load_county_pop(pop_file: str) -> DataFrame:
+    """Read in and cache the raw county-level population data so that repeated calls do not re-parse the file.
+    The returned dataframe is shared between callers and should not be modified in place.
+
+    :param pop_file:                    Full path to the raw county population .csv file
+    :type pop_file:                     str
+
+    :return:                            DataFrame
+
+    """
+
+    # Read in the raw county-level population .csv file from the U.S. Census Bureau:
+    df_pop = _read_csv_fast(pop_file, dtype={'county_FIPS': np.int32})
+
+    # Store the population counts using the smallest integer type that fits them:
+    for col in df_pop.columns[df_pop.columns.str.startswith('pop_')]:
+        df_pop[col] = pd.to_numeric(df_pop[col], downcast='integer')
+
+    return df_pop
+
 
 def fips_pop_yearly(pop_input_dir: str, start_year: int, end_year: int) -> DataFrame:
     """Read in the raw population data, format columns, and return single dataframe for all years
@@ -26,30 +72,54 @@ def fips_pop_yearly(pop_input_dir: str, start_year: int, end_year: int) -> DataF
     """
 
     # Read in the raw county-level population .csv file from the U.S. Census Bureau:
-    df_pop = pd.read_csv(pop_input_dir + '/county_populations_2000_to_2020.csv')
+    df_pop = _load_county_pop(os.path.abspath(os.path.join(pop_input_dir, 'county_populations_2000_to_2020.csv')))
 
-    # Loop over the range of years defined by the 'start_year' and 'end_year' variables:
-    for y in range(start_year, end_year + 1):
+    # Only keep the population columns for the range of years defined by the 'start_year' and 'end_year' variables:
+    key = [f'pop_{y}' for y in range(start_year, end_year + 1)] + ['county_FIPS']
 
-        # Only keep columns that are needed:
-        key = [f'pop_{y}', 'county_FIPS']
+    # Reshape the population columns into a single column with a new variable to indicate the year:
+    df = df_pop[key].melt(id_vars='county_FIPS', var_name='year', value_name='population')
 
-        # Change the variable name for population for the year:
-        df_pop_yr = df_pop[key].copy()
+    # Convert the year from the original column name (e.g., 'pop_2019') to an integer:
+    df['year'] = df['year'].str.slice(4).astype(np.int32)
 
-        # Assign a new variable to indicate the year:
-        df_pop_yr['year'] = y
+    return df
 
-        # Rename some columns for consistency:
-        df_pop_yr.rename(columns={f'pop_{y}': 'population'}, inplace=True)
 
-        # Concatenate all the years into a single dataframe:
-        if y == start_year:
-            df = df_pop_yr.copy()
-        else:
-            df = pd.concat([df, df_pop_yr])
+def _ba_county_mapping(map_input_dir: str) -> DataFrame:
+    """Read in the BA-to-county mapping files and attach the BA names for each valid BA number
 
-    return df
+    :param map_input_dir:               Directory where the BA-to-county mapping is stored
+    :type map_input_dir:                str
+
+    :return:                            DataFrame
+
+    """
+
+    # Load in the BA-to-county mapping files produced by the 'spatial_mapping.py' functions, only keeping the columns
+    # that are needed as nullable integers, and concatenate them across years:
+    df = pd.concat([_read_csv_fast(file,
+                                   usecols=['Year', 'County_FIPS', 'BA_Number'],
+                                   dtype={'County_FIPS': 'Int32', 'BA_Number': 'Int32'})
+                    for file in sorted(glob(os.path.join(map_input_dir, '*.csv')))],
+                   ignore_index=True)
+
+    # Remove counties that are not assigned to a BA:
+    df = df.dropna(subset=['County_FIPS', 'BA_Number'])
+
+    # Select for valid (and unique) BA numbers using the 'metadata_eia.py' functions:
+    unique_num = np.unique(df['BA_Number'].to_numpy(dtype=np.int64))
+    metadata_df = metadata_eia(unique_num)
+
+    # Merge the mapping dataframe to the the metadata dataframe based on BA number, making sure each BA number only
+    # appears once in the metadata:
+    df_map = df.merge(metadata_df, on=['BA_Number'], validate='m:1')
+
+    # Rename some columns for consistency:
+    df_map.rename(columns={"County_FIPS": "county_FIPS"}, inplace=True)
+    df_map.rename(columns={"Year": "year"}, inplace=True)
+
+    return df_map
 
 
 def merge_mapping_data(map_input_dir: str, pop_input_dir: str, start_year: int, end_year: int) -> DataFrame:
@@ -71,48 +141,77 @@ def merge_mapping_data(map_input_dir: str, pop_input_dir: str, start_year: int,
 
     """
 
-    # Load in the BA-to-county mapping files produced by the 'spatial_mapping.py' functions:
-    for idx, file in enumerate(glob(f'{map_input_dir}/*.csv')):
+    # Get the BA-to-county mapping using the '_ba_county_mapping' function:
+    df_map = _ba_county_mapping(map_input_dir)
 
-        # Read in the .csv file:
-        dfx = pd.read_csv(os.path.join(map_input_dir, file))
+    # Get sum of population by FIPS code (e.g., counties) using the 'fips_pop_yearly' function:
+    df_pop = fips_pop_yearly(pop_input_dir, start_year, end_year)
 
-        # Concatenate the BA-to-county mapping files across years:
-        if idx == 0:
-            df = dfx.copy()
-        else:
-            df = pd.concat([df, dfx])
+    # Index the mapping by county FIPS code and year so the lookup table is only built once:
+    df_map = df_map.set_index(['county_FIPS', 'year'])
 
-    # Only keep the columns that are needed:
-    df = df[['Year', 'County_FIPS', 'BA_Number']].copy()
+    # Join the dataframes based on county FIPS code and year; counties served by more than one BA appear once per BA:
+    df_combine = df_pop.join(df_map, on=['county_FIPS', 'year'], how='left').reset_index(drop=True)
 
-    # Fill in missing values and reassign the variables as integers:
-    df['BA_Number'] = df['BA_Number'].fillna(0).astype(np.int64)
-    df['County_FIPS'] = df['County_FIPS'].fillna(0).astype(np.int64)
+    return df_combine
 
-    # Select for valid (and unique) BA numbers using the 'metadata_eia.py' functions:
-    num = df['BA_Number'].tolist()
-    unique_num = np.unique(num).tolist()
-    metadata_df = metadata_eia(unique_num)
 
-    # Merge the mapping dataframe to the the metadata dataframe based on BA number:
-    df_map = df.merge(metadata_df, on=['BA_Number'])
+def ba_pop_sum(map_input_dir: str, pop_input_dir: str, start_year: int, end_year: int) -> DataFrame:
+    """Sum the total population within a BA's service territory in a given year
 
-    # Rename some columns for consistency:
-    df_map.rename(columns={"County_FIPS": "county_FIPS"}, inplace=True)
-    df_map.rename(columns={"Year": "year"}, inplace=True)
+    :param map_input_dir:               Directory where the BA-to-county mapping is stored
+    :type map_input_dir:                str
 
-    # Get sum of population by FIPS code (e.g., counties) using the 'fips_pop_yearly' function:
+    :param pop_input_dir:               Directory where raw county population data is stored
+    :type pop_input_dir:                str
+
+    :param start_year:                  Year to start process; four digit year (e.g., 1990)
+    :type start_year:                   int
+
+    :param end_year:                    Year to end process; four digit year (e.g., 1990)
+    :type end_year:                     int
+
+    :return:                            DataFrame
+
+    """
+
+    # Get the BA-to-county mapping and the population by FIPS code (e.g., counties):
+    df_map = _ba_county_mapping(map_input_dir)
     df_pop = fips_pop_yearly(pop_input_dir, start_year, end_year)
 
-    # Merge the dataframes based on county FIPS code and year:
-    df_combine = pd.merge(df_pop, df_map, how='left', left_on=['county_FIPS', 'year'], right_on=['county_FIPS', 'year'])
+    # Build a lookup table of population by county FIPS code and year, keeping track of which entries have data:
+    n_fips = int(df_pop['county_FIPS'].max()) + 1 if len(df_pop) > 0 else 0
+    n_years = end_year - start_year + 1
+    pop_lut = np.zeros((n_fips, n_years), dtype=np.result_type(df_pop['population'].dtype, np.int64))
+    has_pop = np.zeros((n_fips, n_years), dtype=bool)
 
-    return df_combine
+    fips = df_pop['county_FIPS'].to_numpy(dtype=np.int64)
+    year = df_pop['year'].to_numpy(dtype=np.int64) - start_year
+    pop_lut[fips, year] = df_pop['population'].fillna(0).to_numpy()
+    has_pop[fips, year] = True
 
+    # Only keep the mapping for the years being processed and counties covered by the lookup table:
+    df_map = df_map[(df_map['year'] >= start_year) & (df_map['year'] <= end_year) & (df_map['county_FIPS'] < n_fips)]
 
-def ba_pop_sum(map_input_dir: str, pop_input_dir: str, start_year: int, end_year: int) -> DataFrame:
-    """Sum the total population within a BA's service territory in a given year
+    # Look up the population of each county in each BA's service territory rather than merging the full tables,
+    # dropping counties that do not have population data:
+    fips = df_map['county_FIPS'].to_numpy(dtype=np.int64)
+    year = df_map['year'].to_numpy(dtype=np.int64) - start_year
+    df_pop = df_map[['BA_Name', 'year']].assign(population=pop_lut[fips, year])[has_pop[fips, year]]
+
+    # Store the BA names as categories and the year as a small integer to speed up the grouping:
+    df_pop['BA_Name'] = df_pop['BA_Name'].astype('category')
+    df_pop['year'] = df_pop['year'].astype(np.int16)
+
+    # Sum the population for each BA by year:
+    df = df_pop.groupby(['BA_Name', 'year'], observed=True, sort=False)['population'].sum().reset_index()
+
+    return df
+
+
+def ba_pop_sum_polars(map_input_dir: str, pop_input_dir: str, start_year: int, end_year: int) -> DataFrame:
+    """Sum the total population within a BA's service territory in a given year using polars. This produces the same
+    output as 'ba_pop_sum' and requires the 'polars' extra (polars>=1.0).
 
     :param map_input_dir:               Directory where the BA-to-county mapping is stored
     :type map_input_dir:                str
@@ -130,16 +229,81 @@ def ba_pop_sum(map_input_dir: str, pop_input_dir: str, start_year: int, end_year
 
     """
 
-    # Get population from the 'merge_mapping_data' function:
-    df_pop = merge_mapping_data(map_input_dir, pop_input_dir, start_year, end_year)
+    import polars as pl
+
+    # Read in the raw county-level population data and reshape the population columns for the range of years defined
+    # by the 'start_year' and 'end_year' variables into a single column with a new variable to indicate the year:
+    pop = (pl.scan_csv(os.path.join(pop_input_dir, 'county_populations_2000_to_2020.csv'))
+           .select(['county_FIPS'] + [f'pop_{y}' for y in range(start_year, end_year + 1)])
+           .unpivot(index='county_FIPS', variable_name='year', value_name='population')
+           .with_columns(pl.col('county_FIPS').cast(pl.Int64),
+                         pl.col('year').str.slice(4).cast(pl.Int64)))
+
+    # Read in the BA-to-county mapping files for the years being processed, removing counties without a BA:
+    mapping = (pl.scan_csv(os.path.join(map_input_dir, '*.csv'),
+                           schema_overrides={'County_FIPS': pl.Float64, 'BA_Number': pl.Float64})
+               .select(pl.col('Year').cast(pl.Int64).alias('year'),
+                       pl.col('County_FIPS').cast(pl.Int64).alias('county_FIPS'),
+                       pl.col('BA_Number').cast(pl.Int64))
+               .drop_nulls()
+               .collect())
+
+    # Get the BA names for each valid (and unique) BA number using the 'metadata_eia.py' functions:
+    metadata_df = metadata_eia(np.unique(mapping['BA_Number'].to_numpy()))
+
+    # Only keep the mapping for the years being processed:
+    mapping = mapping.filter(pl.col('year').is_between(start_year, end_year))
+    metadata = pl.DataFrame({'BA_Number': metadata_df['BA_Number'].to_numpy(dtype=np.int64),
+                             'BA_Name': metadata_df['BA_Name'].tolist()},
+                            schema={'BA_Number': pl.Int64, 'BA_Name': pl.String})
+
+    # Merge the population onto the mapping and sum the population for each BA by year:
+    df = (mapping.lazy()
+          .join(metadata.lazy(), on='BA_Number')
+          .drop_nulls('BA_Name')
+          .join(pop, on=['county_FIPS', 'year'])
+          .group_by(['BA_Name', 'year'])
+          .agg(pl.col('population').sum())
+          .collect())
+
+    return pd.DataFrame(df.to_dict(as_series=False))
+
+
+def _interpolate_to_hourly(df: DataFrame, rng: pd.DatetimeIndex) -> DataFrame:
+    """Linearly interpolate an annual population time-series for each BA to an hourly resolution. Years without data
+    are skipped, hours before the first valid year are left empty, and the last valid year is held constant to the
+    end of the range.
+
+    :param df:                          Annual population with one row per year (as a datetime index) and one column
+                                        per BA
+    :type df:                           DataFrame
+
+    :param rng:                         Hourly timestamps to interpolate to
+    :type rng:                          DatetimeIndex
 
-    # Sum the population for each BA by year:
-    df = df_pop.groupby(['BA_Name', 'year'])['population'].sum().reset_index()
+    :return:                            DataFrame
 
-    return df
+    """
+
+    # Convert the annual and hourly timestamps to numbers so they can be used as interpolation coordinates:
+    x_anchors = df.index.values.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    x_hourly = rng.values.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+
+    # Linearly interpolate each BA that has at least one year of data:
+    pop = df.to_numpy(dtype=np.float64)
+    res = np.full((len(x_hourly), pop.shape[1]), np.nan)
+    for j in range(pop.shape[1]):
+        valid = ~np.isnan(pop[:, j])
+        if valid.any():
+            res[:, j] = np.interp(x_hourly, x_anchors[valid], pop[valid, j], left=np.nan)
 
+    # Store the interpolated population as single precision to halve the amount of data written out; this keeps about
+    # 7 significant digits (relative error of about 1e-7), so populations near 65 million can shift by up to 2 people:
+    return pd.DataFrame(res.astype(np.float32), index=rng, columns=df.columns)
 
-def process_ba_population_data(start_year: int, end_year: int, data_input_dir: str):
+
+def process_ba_population_data(start_year: int, end_year: int, data_input_dir: str, output_format: str = 'csv',
+                               engine: str = 'pandas'):
     """Calculate a time-series of the total population living with a BAs service territory
 
     :param start_year:                         Year to start process; four digit year (e.g., 1990)
@@ -151,8 +315,23 @@ def process_ba_population_data(start_year: int, end_year: int, data_input_dir: s
     :param data_input_dir:                     Top-level data directory for TELL
     :type data_input_dir:                      str
 
+    :param output_format:                      Format of the output files; either 'csv' (default) or 'parquet'.
+                                               Writing to 'parquet' requires the 'parquet' extra (pyarrow).
+    :type output_format:                       str
+
+    :param engine:                             Library used to sum the population within each BA; either 'pandas'
+                                               (default) or 'polars'. Using 'polars' requires the 'polars' extra.
+    :type engine:                              str
+
     """
 
+    # Make sure the output format and engine are supported:
+    if output_format not in ('csv', 'parquet'):
+        raise ValueError(f"Output format '{output_format}' is not supported. Use either 'csv' or 'parquet'.")
+
+    if engine not in ('pandas', 'polars'):
+        raise ValueError(f"Engine '{engine}' is not supported. Use either 'pandas' or 'polars'.")
+
     # Set the output directory based on the "data_input_dir" variable:
     output_dir = os.path.join(data_input_dir, r'tell_quickstarter_data', r'outputs', r'historical_population')
 
@@ -164,8 +343,11 @@ def process_ba_population_data(start_year: int, end_year: int, data_input_dir: s
     map_input_dir = os.path.join(data_input_dir, r'tell_quickstarter_data', r'outputs', r'ba_service_territory')
     pop_input_dir = os.path.join(data_input_dir, r'tell_raw_data', r'Population')
 
-    # Sum the populations using the 'ba_pop_sum' function:
-    df = ba_pop_sum(map_input_dir, pop_input_dir, start_year, end_year)
+    # Sum the populations using the 'ba_pop_sum' or 'ba_pop_sum_polars' function:
+    if engine == 'polars':
+        df = ba_pop_sum_polars(map_input_dir, pop_input_dir, start_year, end_year)
+    else:
+        df = ba_pop_sum(map_input_dir, pop_input_dir, start_year, end_year)
 
     # Convert the year to a datetime variable:
     df['year'] = pd.to_datetime(df['year'], format='%Y')
@@ -174,8 +356,8 @@ def process_ba_population_data(start_year: int, end_year: int, data_input_dir: s
     df.rename(columns={"population": "pop"}, inplace=True)
     df.rename(columns={'BA_Name': 'name'}, inplace=True)
 
-    # Reshape the dataframe so that the interpolation will work:
-    df = df.pivot(index='name', columns='year', values='pop')
+    # Reshape the dataframe so that each BA is a column and each year is a row:
+    df = df.pivot(index='year', columns='name', values='pop')
 
     # Set the start and end times for the interpolation:
     rng_start = f'{start_year}-01-01 00:00:00'
@@ -186,20 +368,18 @@ def process_ba_population_data(start_year: int, end_year: int, data_input_dir: s
     # Get a range of dates to interpolate to:
     rng = pd.date_range(rng_start, rng_end, freq='H')
 
-    # Reindex the dataframe and linearly interpolate from an annual to an hourly resolution:
-    df_interp = df.reindex(rng, axis=1).interpolate(axis=1)
-
-    # Transpose the interpolated dataframe:
-    df_interp = df_interp.T
+    # Linearly interpolate from an annual to an hourly resolution using the '_interpolate_to_hourly' function:
+    df_interp = _interpolate_to_hourly(df, rng)
 
     # Reset the index variable:
     df_interp.reset_index(level=0, inplace=True)
 
-    # Extract the year, month, day, and hour for each date:
-    df_interp['Year'] = df_interp['index'].dt.strftime('%Y')
-    df_interp['Month'] = df_interp['index'].dt.strftime('%m')
-    df_interp['Day'] = df_interp['index'].dt.strftime('%d')
-    df_interp['Hour'] = df_interp['index'].dt.strftime('%H')
+    # Extract the year, month, day, and hour for each date as integers:
+    ts = df_interp['index']
+    df_interp['Year'] = ts.dt.year.astype(np.int16)
+    df_interp['Month'] = ts.dt.month.astype(np.int8)
+    df_interp['Day'] = ts.dt.day.astype(np.int8)
+    df_interp['Hour'] = ts.dt.hour.astype(np.int8)
 
     # Reorder the columns and remove the datestring variable:
     col = df_interp.pop("Year")
@@ -218,12 +398,21 @@ def process_ba_population_data(start_year: int, end_year: int, data_input_dir: s
     df_names = df_interp.loc[:, ~df_interp.columns.isin(['Year', 'Month', 'Day', 'Hour'])]
     BA_name = list(df_names)
 
-    # Loop over BA names to write each BA's population time-series to a .csv file:
+    # Loop over BA names to write each BA's population time-series to a .parquet or .csv file:
     for name in BA_name:
-        df_interp.to_csv(os.path.join(output_dir, f'{name}_hourly_population_data.csv'),
-                         index=False,
-                         columns=['Year', 'Month', 'Day', 'Hour', f'{name}'],
-                         header=['Year', 'Month', 'Day', 'Hour', 'Total_Population'])
+        if output_format == 'parquet':
+            df_ba = df_interp[['Year', 'Month', 'Day', 'Hour', name]].rename(columns={name: 'Total_Population'})
+            df_ba.columns = df_ba.columns.astype(str)
+            df_ba.to_parquet(os.path.join(output_dir, f'{name}_hourly_population_data.parquet'),
+                             engine='pyarrow',
+                             compression='zstd',
+                             index=False)
+        else:
+            df_interp.to_csv(os.path.join(output_dir, f'{name}_hourly_population_data.csv'),
+                             index=False,
+                             float_format='%.2f',
+                             columns=['Year', 'Month', 'Day', 'Hour', f'{name}'],
+                             header=['Year', 'Month', 'Day', 'Hour', 'Total_Population'])
 
 
 def extract_future_ba_population(year: int, ba_code: str, scenario: str, data_input_dir: str) -> pd.DataFrame:
@@ -251,16 +440,16 @@ def extract_future_ba_population(year: int, ba_code: str, scenario: str, data_in
     pop_input_dir = os.path.join(data_input_dir, r'sample_forcing_data', r'sample_population_projections')
 
     # Read in the BA mapping .csv file:
-    mapping_df = pd.read_csv(os.path.join(map_input_dir, 'ba_service_territory_2019.csv'))
+    mapping_df = _read_csv_fast(os.path.join(map_input_dir, 'ba_service_territory_2019.csv'))
 
     # Only keep the columns that are needed:
-    mapping_df = mapping_df[['County_FIPS', 'BA_Code']].copy()
+    mapping_df = mapping_df[['County_FIPS', 'BA_Code']]
 
     # Subset to only the BA you want to process:
     mapping_df = mapping_df[mapping_df["BA_Code"] == ba_code]
 
     # Read in the population projection file for the scenario you want to process:
-    pop_df = pd.read_csv(os.path.join(pop_input_dir, f'{scenario}_county_population.csv'))
+    pop_df = _read_csv_fast(os.path.join(pop_input_dir, f'{scenario}_county_population.csv'))
 
     # Rename some columns for consistency:
     pop_df.rename(columns={"FIPS": "County_FIPS"}, inplace=True)
@@ -269,7 +458,7 @@ def extract_future_ba_population(year: int, ba_code: str, scenario: str, data_in
     mapping_df = mapping_df.merge(pop_df, on=['County_FIPS'])
 
     # Only keep the columns that are needed:
-    df = mapping_df[['2020', '2030', '2040', '2050', '2060', '2070', '2080', '2090', '2100']].copy()
+    df = mapping_df[['2020', '2030', '2040', '2050', '2060', '2070', '2080', '2090', '2100']]
 
     # Sum the population across all counties:
     df_sum = df.sum(axis=0)
@@ -1,9 +1,9 @@
 import os
 import shutil
+import tempfile
 import zipfile
 import requests
 
-from io import BytesIO as BytesIO
 from pkg_resources import get_distribution
 
 
@@ -42,14 +42,35 @@ class InstallQuickstarterData:
 
         # Retrieve content from the URL:
         print(f"Downloading the quickstarter data package for tell version {current_version}...")
-        r = requests.get(data_link)
 
-        # Extract the data from the .zip file:
-        with zipfile.ZipFile(BytesIO(r.content)) as zipped:
-            zipped.extractall(self.data_dir)
+        # Write the download next to where it will be extracted rather than the system temporary directory:
+        if self.data_dir is not None:
+            os.makedirs(self.data_dir, exist_ok=True)
 
-        # Remove the empty "__MACOSX" directory:
-        shutil.rmtree(os.path.join(self.data_dir, r'__MACOSX'))
+        tmp = None
+
+        try:
+            tmp = tempfile.NamedTemporaryFile(suffix='.zip', dir=self.data_dir, delete=False)
+
+            # Stream the content to a temporary file in chunks rather than holding it all in memory:
+            with requests.get(data_link, stream=True) as r:
+                r.raise_for_status()
+                r.raw.decode_content = True
+                shutil.copyfileobj(r.raw, tmp, length=1024 * 1024)
+
+            tmp.close()
+
+            # Extract the data from the .zip file without writing the macOS metadata files to disk:
+            with zipfile.ZipFile(tmp.name) as zipped:
+                members = [i for i in zipped.namelist()
+                           if not i.startswith('__MACOSX/') and not i.endswith('.DS_Store')]
+                zipped.extractall(self.data_dir, members=members)
+
+        finally:
+            # Close and remove the temporary .zip file:
+            if tmp is not None:
+                tmp.close()
+                os.unlink(tmp.name)
 
         # Report that the download is complete:
         print(f"Done!")
@@ -0,0 +1,81 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from tell.data_process_eia_930 import eia_data_subset, list_EIA_930_files
+
+
+class TestDataProcessEIA930(unittest.TestCase):
+    """Tests for functionality within data_process_eia_930.py"""
+
+    def setUp(self):
+        """Write a small EIA-930 style workbook to a temporary directory"""
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_input_dir = self.temp_dir.name
+        self.file_string = os.path.join(self.data_input_dir, 'AEC.xlsx')
+
+        wb = openpyxl.Workbook()
+        wb.active.title = 'Other'
+        ws = wb.create_sheet('Published Hourly Data')
+
+        # extra columns that are not needed are interleaved with the ones that are
+        ws.append(['BA', 'UTC time', 'D', 'DF', 'Adjusted D', 'NG', 'Adjusted NG', 'Adjusted TI', 'Notes'])
+        ws.append(['AEC', datetime.datetime(2019, 1, 1, 0), 1, 10.5, 11, 2, 12, -1, 'note'])
+        ws.append([])
+        ws.append(['AEC', datetime.datetime(2019, 1, 1, 1), 1, 20.5, 21, 2, 22, -2, 'note'])
+
+        # a row whose trailing cells are empty
+        ws.append(['AEC', datetime.datetime(2019, 1, 1, 2), 1, 30.5, 31, 2, 32])
+        ws.append([])
+        ws.append([])
+
+        wb.save(self.file_string)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_eia_data_subset(self):
+        """Test to ensure high level functionality of eia_data_subset()"""
+
+        eia_data_subset(self.file_string, self.data_input_dir)
+
+        df = pd.read_csv(os.path.join(self.data_input_dir, 'tell_quickstarter_data', 'outputs', 'historical_ba_load',
+                                      'AEC_hourly_load_data.csv'))
+
+        expected = pd.DataFrame({'Year': [2019, 2019, 2019],
+                                 'Month': [1, 1, 1],
+                                 'Day': [1, 1, 1],
+                                 'Hour': [0, 1, 2],
+                                 'Forecast_Demand_MWh': [10.5, 20.5, 30.5],
+                                 'Adjusted_Demand_MWh': [11, 21, 31],
+                                 'Adjusted_Generation_MWh': [12, 22, 32],
+                                 'Adjusted_Interchange_MWh': [-1, -2, np.nan]})
+
+        pd.testing.assert_frame_equal(expected, df)
+
+    def test_list_EIA_930_files(self):
+        """Test to ensure list_EIA_930_files() skips missing files and fails when none are found"""
+
+        # ensure an error is raised when there are no files to process
+        with self.assertRaises(FileNotFoundError):
+            list_EIA_930_files(self.data_input_dir)
+
+        input_dir = os.path.join(self.data_input_dir, 'tell_raw_data', 'EIA_930', 'Balancing_Authority')
+        os.makedirs(input_dir)
+        os.rename(self.file_string, os.path.join(input_dir, 'AEC.xlsx'))
+
+        # ensure the BAs without a file are skipped with a warning
+        with self.assertWarns(UserWarning):
+            path_list = list_EIA_930_files(self.data_input_dir)
+
+        self.assertEqual([os.path.join(input_dir, 'AEC.xlsx')], path_list)
+
+
+if __name__ == '__main__':
+    unittest.main()
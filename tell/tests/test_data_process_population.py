@@ -0,0 +1,176 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from tell.data_process_population import (fips_pop_yearly, merge_mapping_data, ba_pop_sum, ba_pop_sum_polars,
+                                         _interpolate_to_hourly, process_ba_population_data)
+
+
+class TestDataProcessPopulation(unittest.TestCase):
+    """Tests for functionality within data_process_population.py"""
+
+    def setUp(self):
+        """Write small county population and BA-to-county mapping files to a temporary directory"""
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.pop_input_dir = self.temp_dir.name
+        self.map_input_dir = os.path.join(self.temp_dir.name, 'ba_service_territory')
+        os.makedirs(self.map_input_dir)
+
+        df = pd.DataFrame({'county_FIPS': [1001, 1003, 1005],
+                           'pop_2018': [10, 20, 30],
+                           'pop_2019': [11, 21, 31],
+                           'pop_2020': [12, 22, 32]})
+
+        df.to_csv(os.path.join(self.pop_input_dir, 'county_populations_2000_to_2020.csv'), index=False)
+
+        # county 1003 is served by both AEC (189) and SOCO (18195)
+        for year in [2018, 2019]:
+            df = pd.DataFrame({'Year': year,
+                               'County_FIPS': [1001.0, 1003.0, 1003.0, 1005.0],
+                               'BA_Number': [189.0, 189.0, 18195.0, None],
+                               'BA_Code': ['AEC', 'AEC', 'SOCO', None]})
+
+            df.to_csv(os.path.join(self.map_input_dir, f'ba_service_territory_{year}.csv'), index=False)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_fips_pop_yearly(self):
+        """Test to ensure high level functionality of fips_pop_yearly()"""
+
+        df = fips_pop_yearly(self.pop_input_dir, 2018, 2019)
+
+        # check that there is one row per county per year
+        self.assertEqual(6, len(df))
+        self.assertEqual([2018, 2019], sorted(df['year'].unique().tolist()))
+
+        # ensure the population values line up with the right county and year
+        value = df.loc[(df['county_FIPS'] == 1003) & (df['year'] == 2019), 'population'].item()
+        self.assertEqual(21, value)
+
+    def test_merge_mapping_data(self):
+        """Test to ensure high level functionality of merge_mapping_data()"""
+
+        df = merge_mapping_data(self.map_input_dir, self.pop_input_dir, 2018, 2019)
+
+        # check that counties served by more than one BA appear once per BA and unmapped counties are kept
+        self.assertEqual(8, len(df))
+
+        df_shared = df[(df['county_FIPS'] == 1003) & (df['year'] == 2019)]
+        self.assertEqual(['AEC', 'SOCO'], sorted(df_shared['BA_Name'].tolist()))
+        self.assertEqual([21, 21], df_shared['population'].tolist())
+
+        # ensure counties without a BA are kept without a BA name
+        df_unmapped = df[df['county_FIPS'] == 1005]
+        self.assertEqual(2, len(df_unmapped))
+        self.assertTrue(df_unmapped['BA_Name'].isna().all())
+
+    def test_ba_pop_sum(self):
+        """Test to ensure high level functionality of ba_pop_sum()"""
+
+        df = ba_pop_sum(self.map_input_dir, self.pop_input_dir, 2018, 2019)
+        df = df.set_index(['BA_Name', 'year'])['population']
+
+        # check that there is one row per BA per year
+        self.assertEqual(4, len(df))
+
+        # ensure counties served by more than one BA count toward each of them
+        self.assertEqual(30, df.loc[('AEC', 2018)])
+        self.assertEqual(32, df.loc[('AEC', 2019)])
+        self.assertEqual(21, df.loc[('SOCO', 2019)])
+
+        # ensure years without any mapping data return an empty dataframe
+        df = ba_pop_sum(self.map_input_dir, self.pop_input_dir, 2020, 2020)
+
+        self.assertEqual(0, len(df))
+        self.assertEqual(['BA_Name', 'year', 'population'], df.columns.tolist())
+
+    @unittest.skipIf(importlib.util.find_spec('polars') is None, 'polars is not installed')
+    def test_ba_pop_sum_polars(self):
+        """Test to ensure ba_pop_sum_polars() matches ba_pop_sum()"""
+
+        df_pandas = ba_pop_sum(self.map_input_dir, self.pop_input_dir, 2018, 2019)
+        df_polars = ba_pop_sum_polars(self.map_input_dir, self.pop_input_dir, 2018, 2019)
+
+        df_pandas = df_pandas.astype({'BA_Name': str, 'year': int}).set_index(['BA_Name', 'year'])['population']
+        df_polars = df_polars.astype({'BA_Name': str, 'year': int}).set_index(['BA_Name', 'year'])['population']
+
+        self.assertEqual(df_pandas.sort_index().to_dict(), df_polars.sort_index().to_dict())
+
+        # ensure years without any mapping data return an empty dataframe
+        df = ba_pop_sum_polars(self.map_input_dir, self.pop_input_dir, 2020, 2020)
+
+        self.assertEqual(0, len(df))
+        self.assertEqual(['BA_Name', 'year', 'population'], df.columns.tolist())
+
+    def test_interpolate_to_hourly(self):
+        """Test to ensure the edge behavior of _interpolate_to_hourly()"""
+
+        # 'A' has data every year, 'B' is missing its first year, and 'C' only has a single valid year
+        df = pd.DataFrame({'A': [100.0, 200.0, 300.0],
+                           'B': [np.nan, 200.0, 400.0],
+                           'C': [np.nan, 500.0, np.nan]},
+                          index=pd.to_datetime(['2018', '2019', '2020'], format='%Y'))
+
+        rng = pd.date_range('2018-01-01 00:00:00', '2020-12-31 23:00:00', freq='h')
+
+        df_interp = _interpolate_to_hourly(df, rng)
+
+        self.assertEqual(len(rng), len(df_interp))
+
+        # ensure values are linear in time between the annual values
+        mid_2018 = pd.Timestamp('2018-07-02 12:00:00')
+        self.assertAlmostEqual(100.0, df_interp.loc['2018-01-01 00:00:00', 'A'])
+        self.assertAlmostEqual(150.0, df_interp.loc[mid_2018, 'A'], places=3)
+        self.assertAlmostEqual(200.0, df_interp.loc['2019-01-01 00:00:00', 'A'])
+
+        # ensure hours before the first valid year are left empty
+        self.assertTrue(df_interp.loc[:'2018-12-31 23:00:00', 'B'].isna().all())
+        self.assertAlmostEqual(200.0, df_interp.loc['2019-01-01 00:00:00', 'B'])
+
+        # ensure the last valid year is held constant to the end of the range
+        self.assertTrue((df_interp.loc['2020-01-01 00:00:00':, 'A'] == 300.0).all())
+        self.assertTrue((df_interp.loc['2020-01-01 00:00:00':, 'B'] == 400.0).all())
+
+        # ensure a BA with a single valid year is empty before it and constant after it
+        self.assertTrue(df_interp.loc[:'2018-12-31 23:00:00', 'C'].isna().all())
+        self.assertTrue((df_interp.loc['2019-01-01 00:00:00':, 'C'] == 500.0).all())
+
+    def test_process_ba_population_data_csv(self):
+        """Test to ensure the population .csv output is written in positional notation"""
+
+        data_input_dir = os.path.join(self.temp_dir.name, 'tell_data')
+        pop_input_dir = os.path.join(data_input_dir, 'tell_raw_data', 'Population')
+        map_input_dir = os.path.join(data_input_dir, 'tell_quickstarter_data', 'outputs', 'ba_service_territory')
+        os.makedirs(pop_input_dir)
+        os.makedirs(map_input_dir)
+
+        # use populations large enough that the shortest float repr would switch to scientific notation
+        df = pd.DataFrame({'county_FIPS': [1001], 'pop_2018': [145410018], 'pop_2019': [145410018]})
+        df.to_csv(os.path.join(pop_input_dir, 'county_populations_2000_to_2020.csv'), index=False)
+
+        for year in [2018, 2019]:
+            df = pd.DataFrame({'Year': [year], 'County_FIPS': [1001.0], 'BA_Number': [189.0], 'BA_Code': ['AEC']})
+            df.to_csv(os.path.join(map_input_dir, f'ba_service_territory_{year}.csv'), index=False)
+
+        process_ba_population_data(2018, 2019, data_input_dir)
+
+        output_file = os.path.join(data_input_dir, 'tell_quickstarter_data', 'outputs', 'historical_population',
+                                   'AEC_hourly_population_data.csv')
+
+        with open(output_file) as f:
+            lines = f.read().splitlines()
+
+        # ensure the population is written with two decimals and not in scientific notation
+        self.assertEqual('Year,Month,Day,Hour,Total_Population', lines[0])
+        self.assertEqual('2018,1,1,0,145410016.00', lines[1])
+        self.assertFalse(any('e+' in line for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()